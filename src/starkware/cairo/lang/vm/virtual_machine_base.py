@@ -1,12 +1,15 @@
 import dataclasses
 import sys
 from abc import ABC
+from functools import lru_cache
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+
 from starkware.cairo.lang.compiler.debug_info import DebugInfo, InstructionLocation
 from starkware.cairo.lang.compiler.encode import is_call_instruction
 from starkware.cairo.lang.compiler.expression_evaluator import ExpressionEvaluator
-from starkware.cairo.lang.compiler.instruction import decode_instruction_values
+from starkware.cairo.lang.compiler.instruction import N_FLAGS, OFFSET_BITS
 from starkware.cairo.lang.compiler.program import Program, ProgramBase
 from starkware.cairo.lang.vm.builtin_runner import BuiltinRunner
 from starkware.cairo.lang.vm.memory_dict import MemoryDict
@@ -32,6 +35,22 @@ class CompiledHint:
     consts: Callable[..., VmConsts]
 
 
+@lru_cache(maxsize=4096)
+def is_call_instruction_cached(encoded_instruction: int, imm: Optional[int]) -> bool:
+    """
+    Same as is_call_instruction(), but caches the result, as the same instructions are checked
+    repeatedly when tracebacks are computed.
+    """
+    return is_call_instruction(encoded_instruction=encoded_instruction, imm=imm)
+
+
+# Same as compile(), but caches the result, as the same programs are often loaded repeatedly (the
+# hint filenames, which are part of the key, only depend on the order of the hints in the loaded
+# programs). The builtin is wrapped directly, so that it adds no frame to the traceback of a hint
+# with a syntax error.
+compile_cached = lru_cache(maxsize=4096)(compile)
+
+
 class RunContextBase(ABC):
     """
     Contains a complete state of the virtual machine. This includes registers and memory.
@@ -48,33 +67,35 @@ class RunContextBase(ABC):
         Returns the values of pc of the call instructions in the traceback.
         Returns the most recent call last.
         """
+        # Bind the memory getter to a local variable, to avoid repeated attribute lookups.
+        memory_get = self.memory.get
         entries = []
         fp = self.fp
         for _ in range(MAX_TRACEBACK_ENTRIES):
-            if self.memory.get(fp - 2) == fp:
+            if memory_get(fp - 2) == fp:
                 break
 
             # Get the previous fp and the return pc.
-            fp, ret_pc = self.memory.get(fp - 2), self.memory.get(fp - 1)
+            fp, ret_pc = memory_get(fp - 2), memory_get(fp - 1)
 
             # If one of them is not in memory, abort.
             if fp is None or ret_pc is None:
                 break
 
             # Get the two memory cells before ret_pc.
-            instruction0, instruction1 = self.memory.get(ret_pc - 2), self.memory.get(ret_pc - 1)
+            instruction0, instruction1 = memory_get(ret_pc - 2), memory_get(ret_pc - 1)
 
             # Try to check if the call instruction is (instruction0, instruction1) or just
             # instruction1 (with no immediate).
             # In rare cases this may be ambiguous.
-            if instruction1 is not None and is_call_instruction(
+            if instruction1 is not None and is_call_instruction_cached(
                 encoded_instruction=instruction1, imm=None
             ):
                 call_pc = ret_pc - 1
             elif (
                 instruction0 is not None
                 and instruction1 is not None
-                and is_call_instruction(encoded_instruction=instruction0, imm=instruction1)
+                and is_call_instruction_cached(encoded_instruction=instruction0, imm=instruction1)
             ):
                 call_pc = ret_pc - 2
             else:
@@ -112,6 +133,26 @@ class VirtualMachineBase(ABC):
         """
         self.prime = program.prime
         self.builtin_runners = builtin_runners
+
+        from starkware.python import math_utils
+
+        # Note that static_locals must not be modified after this point, since it is copied into
+        # every new scope (see enter_scope()).
+        self.static_locals = static_locals.copy() if static_locals is not None else {}
+        self.static_locals.update(
+            {
+                "PRIME": self.prime,
+                "fadd": lambda a, b, p=self.prime: (a + b) % p,
+                "fsub": lambda a, b, p=self.prime: (a - b) % p,
+                "fmul": lambda a, b, p=self.prime: (a * b) % p,
+                "fdiv": lambda a, b, p=self.prime: math_utils.div_mod(a, b, p),
+                "fpow": lambda a, b, p=self.prime: pow(a, b, p),
+                "fis_quad_residue": lambda a, p=self.prime: math_utils.is_quad_residue(a, p),
+                "fsqrt": lambda a, p=self.prime: math_utils.sqrt(a, p),
+                "safe_div": math_utils.safe_div,
+            }
+        )
+
         self.exec_scopes: List[dict] = []
         self.enter_scope(dict(hint_locals))
         self.hints: Dict[MaybeRelocatable, List[CompiledHint]] = {}
@@ -132,23 +173,6 @@ class VirtualMachineBase(ABC):
         # of memory cells in the segment (based on other memory cells).
         self.auto_deduction: Dict[int, List[Tuple[Rule, tuple]]] = {}
 
-        from starkware.python import math_utils
-
-        self.static_locals = static_locals.copy() if static_locals is not None else {}
-        self.static_locals.update(
-            {
-                "PRIME": self.prime,
-                "fadd": lambda a, b, p=self.prime: (a + b) % p,
-                "fsub": lambda a, b, p=self.prime: (a - b) % p,
-                "fmul": lambda a, b, p=self.prime: (a * b) % p,
-                "fdiv": lambda a, b, p=self.prime: math_utils.div_mod(a, b, p),
-                "fpow": lambda a, b, p=self.prime: pow(a, b, p),
-                "fis_quad_residue": lambda a, p=self.prime: math_utils.is_quad_residue(a, p),
-                "fsqrt": lambda a, p=self.prime: math_utils.sqrt(a, p),
-                "safe_div": math_utils.safe_div,
-            }
-        )
-
     def validate_existing_memory(self):
         """
         Validates the builtin values (e.g., range-checks) that are already written to the VM's
@@ -215,7 +239,16 @@ class VirtualMachineBase(ABC):
         if new_scope_locals is None:
             new_scope_locals = {}
 
-        self.exec_scopes.append({**new_scope_locals, **self.builtin_runners})
+        self.exec_scopes.append(
+            {
+                **new_scope_locals,
+                **self.builtin_runners,
+                **self.static_locals,
+                "vm_load_program": self.load_program,
+                "vm_enter_scope": self.enter_scope,
+                "vm_exit_scope": self.exit_scope,
+            }
+        )
 
     def exit_scope(self):
         assert len(self.exec_scopes) > 1, "Cannot exit main scope."
@@ -233,18 +266,10 @@ class VirtualMachineBase(ABC):
             exec_locals["current_step"] = self.current_step
             exec_locals["ids"] = hint.consts(pc, ap, fp, memory)
 
-            exec_locals["vm_load_program"] = self.load_program
-            exec_locals["vm_enter_scope"] = self.enter_scope
-            exec_locals["vm_exit_scope"] = self.exit_scope
-            exec_locals.update(self.static_locals)
-
+            # Note that the values set above are not removed after the hint is executed, as they
+            # are overwritten by the next hint anyway (see clear_hint_locals()).
             self.exec_hint(hint.compiled, exec_locals, hint_index=hint_index)
 
-            # Clear ids (which will be rewritten by the next hint anyway) to make the VM instance
-            # smaller and faster to copy.
-            del exec_locals["ids"]
-            del exec_locals["memory"]
-
             if self.skip_instruction_execution:
                 return
 
@@ -260,7 +285,7 @@ class VirtualMachineBase(ABC):
         This function can be overridden by subclasses.
         """
         try:
-            return compile(source, filename, mode="exec")
+            return compile_cached(source, filename, "exec")
         except (IndentationError, SyntaxError):
             hint_exception = HintException(self, *sys.exc_info())
             raise self.as_vm_exception(
@@ -344,10 +369,16 @@ class VirtualMachineBase(ABC):
         Tries to deduce the value of memory[addr] if it was not already computed.
         Returns the value if deduced, otherwise returns None.
         """
-        if not isinstance(addr, RelocatableValue):
+        # RelocatableValue is not subclassed, so an exact type check (which is cheaper than
+        # isinstance()) suffices.
+        if type(addr) is not RelocatableValue:
+            return None
+
+        # Most segments have no auto deduction rules, so return early in that case.
+        rules = self.auto_deduction.get(addr.segment_index)
+        if rules is None:
             return None
 
-        rules = self.auto_deduction.get(addr.segment_index, [])
         for rule, args in rules:
             value = rule(self, addr, *args)
             if value is None:
@@ -361,24 +392,43 @@ class VirtualMachineBase(ABC):
         """
         Makes sure that all assigned memory cells are consistent with their auto deduction rules.
         """
-        for addr in self.validated_memory:
-            if not isinstance(addr, RelocatableValue):
+        # Iterate over the items of the memory (rather than its keys) to avoid looking up each
+        # address again. Note that the stored values must still be relocated (as done in
+        # MemoryDict.__getitem__()).
+        for addr, stored_value in self.validated_memory.items():
+            # See the comment in deduce_memory_cell().
+            if type(addr) is not RelocatableValue:
+                continue
+            rules = self.auto_deduction.get(addr.segment_index)
+            if rules is None:
                 continue
-            for rule, args in self.auto_deduction.get(addr.segment_index, []):
+            for rule, args in rules:
                 value = rule(self, addr, *args)
                 if value is None:
                     continue
 
-                current = self.validated_memory[addr]
+                current = self.validated_memory.relocate_value(stored_value)
                 # If the values are not the same, try using check_eq to allow a subclass
                 # to override this result.
                 if current != value and not self.check_eq(current, value):
                     raise InconsistentAutoDeductionError(addr, current, value)
 
+    def clear_hint_locals(self):
+        """
+        Removes the per-hint values (such as ids), which are left in the scopes after hints are
+        executed, to make the VM instance smaller and faster to copy.
+        """
+        for exec_locals in self.exec_scopes:
+            exec_locals.pop("ids", None)
+            exec_locals.pop("memory", None)
+
     def end_run(self):
-        self.verify_auto_deductions()
-        if len(self.exec_scopes) != 1:
-            raise VmExceptionBase("Every enter_scope() requires a corresponding exit_scope().")
+        try:
+            self.verify_auto_deductions()
+            if len(self.exec_scopes) != 1:
+                raise VmExceptionBase("Every enter_scope() requires a corresponding exit_scope().")
+        finally:
+            self.clear_hint_locals()
 
 
 def get_perm_range_check_limits(
@@ -387,9 +437,21 @@ def get_perm_range_check_limits(
     """
     Returns the minimum value and maximum value in the perm_range_check component.
     """
-    offsets: List[int] = []
-    for entry in trace:
-        encoded_instruction = memory[entry.pc]
-        _, off0, off1, off2 = decode_instruction_values(encoded_instruction)
-        offsets += [off0, off1, off2]
-    return min(offsets), max(offsets)
+    # The limits only depend on the set of executed instructions, so read the instruction at each
+    # pc only once (instructions in loops are typically executed many times).
+    encoded_instructions = [memory[pc] for pc in {entry.pc for entry in trace}]
+    # Check the range before the conversion to np.uint64, which fails (or wraps) on other values.
+    assert 0 <= min(encoded_instructions, default=0) and max(
+        encoded_instructions, default=0
+    ) < 2 ** (3 * OFFSET_BITS + N_FLAGS), "Unsupported instruction."
+    encoded_instructions_array = np.array(encoded_instructions, dtype=np.uint64)
+
+    # Extract the (biased) offsets off0, off1 and off2, as in decode_instruction_values().
+    # The offsets are written in place into a preallocated buffer, to avoid allocating temporary
+    # arrays for each offset and concatenating them.
+    offset_mask = np.uint64(2 ** OFFSET_BITS - 1)
+    offsets = np.empty((3, len(encoded_instructions_array)), dtype=np.uint64)
+    for i in range(3):
+        np.right_shift(encoded_instructions_array, np.uint64(i * OFFSET_BITS), out=offsets[i])
+        np.bitwise_and(offsets[i], offset_mask, out=offsets[i])
+    return int(offsets.min()), int(offsets.max())
@@ -36,6 +36,17 @@ from starkware.cairo.lang.vm.relocatable import MaybeRelocatable
 
 @dataclasses.dataclass
 class VmConstsContext:
+    # An instance is created whenever a hint is executed. Use __slots__ to make the construction
+    # of instances cheaper.
+    __slots__ = (
+        "identifiers",
+        "evaluator",
+        "reference_manager",
+        "flow_tracking_data",
+        "memory",
+        "pc",
+    )
+
     identifiers: IdentifierManager
     evaluator: Callable[[Expression], Any]
     reference_manager: ReferenceManager
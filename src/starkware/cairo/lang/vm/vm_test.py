@@ -4,14 +4,20 @@ from typing import Dict
 import pytest
 
 from starkware.cairo.lang.compiler.cairo_compile import compile_cairo
+from starkware.cairo.lang.compiler.instruction import decode_instruction_values
 from starkware.cairo.lang.vm.memory_dict import (
     InconsistentMemoryError,
     MemoryDict,
     UnknownMemoryError,
 )
 from starkware.cairo.lang.vm.relocatable import MaybeRelocatable, RelocatableValue
-from starkware.cairo.lang.vm.vm import RunContext, VirtualMachine
-from starkware.cairo.lang.vm.vm_exceptions import InconsistentAutoDeductionError, VmException
+from starkware.cairo.lang.vm.trace_entry import TraceEntry
+from starkware.cairo.lang.vm.vm import RunContext, VirtualMachine, get_perm_range_check_limits
+from starkware.cairo.lang.vm.vm_exceptions import (
+    InconsistentAutoDeductionError,
+    VmException,
+    VmExceptionBase,
+)
 from starkware.python.test_utils import maybe_raises
 
 PRIME = 2 ** 64 + 13
@@ -102,6 +108,41 @@ def test_jnz():
     ] * 5
 
 
+def test_perm_range_check_limits():
+    code = """
+    [ap] = 7; ap++
+
+    loop:
+    jmp body if [ap - 1] != 0
+    [ap] = 4; ap++
+
+    body:
+    [ap] = [ap - 1] - 1; ap++
+    [fp - 1] = [fp - 1]
+    jmp loop
+    """
+
+    vm = run_single(code, 100, pc=10, ap=101)
+
+    offsets = [
+        offset
+        for entry in vm.trace
+        for offset in decode_instruction_values(vm.run_context.memory[entry.pc])[1:]
+    ]
+    assert get_perm_range_check_limits(vm.trace, vm.run_context.memory) == (
+        min(offsets),
+        max(offsets),
+    )
+
+
+@pytest.mark.parametrize("encoded_instruction", [-1, 2 ** 63, 2 ** 64, 2 ** 70])
+def test_perm_range_check_limits_unsupported_instruction(encoded_instruction: int):
+    memory = MemoryDict({10: 0x48307FFE7FFF8000, 11: encoded_instruction})
+    trace = [TraceEntry(pc=pc, ap=100, fp=100) for pc in [10, 11]]
+    with pytest.raises(AssertionError, match="Unsupported instruction."):
+        get_perm_range_check_limits(trace, memory)
+
+
 @pytest.mark.parametrize("offset", [0, -1])
 def test_jnz_relocatables(offset: int):
     code = """
@@ -251,6 +292,34 @@ end
     assert [202 + i in vm.accessed_addresses for i in range(3)] == [True, True, False]
 
 
+def test_hint_in_loop():
+    code = """
+[ap] = 1; ap++
+
+loop:
+let x = [ap - 1]
+%{ memory[ap] = ids.x * 2 %}
+[ap] = [ap]; ap++
+jmp loop
+"""
+
+    vm = run_single(code, 7)
+    assert [vm.run_context.memory[100 + i] for i in range(4)] == [1, 2, 4, 8]
+
+
+def test_compiled_hints_cache():
+    code = """
+%{ memory[ap] = 1 %}
+[ap] = [ap]; ap++
+%{ x = 2 %}
+[ap] = [ap]; ap++
+"""
+    vm0 = run_single(code, 0)
+    vm1 = run_single(code, 0)
+    for pc, hints in vm0.hints.items():
+        assert all(hint0.compiled is hint1.compiled for hint0, hint1 in zip(hints, vm1.hints[pc]))
+
+
 def test_hint_between_references():
     code = """
 let x = 1
@@ -462,6 +531,26 @@ def test_hint_scopes():
         vm.step()
 
 
+@pytest.mark.parametrize("exit_scope", [True, False])
+def test_end_run_clears_hint_locals(exit_scope: bool):
+    code = f"""
+%{{ vm_enter_scope() %}}
+[ap] = 1; ap++
+%{{
+    assert ids is not None
+    {'vm_exit_scope()' if exit_scope else ''}
+%}}
+[ap] = 2; ap++
+"""
+    vm = run_single(code, 2)
+    assert any("ids" in exec_locals for exec_locals in vm.exec_scopes)
+    with maybe_raises(VmExceptionBase, None if exit_scope else "Every enter_scope() requires"):
+        vm.end_run()
+    for exec_locals in vm.exec_scopes:
+        assert "ids" not in exec_locals
+        assert "memory" not in exec_locals
+
+
 def test_skip_instruction_execution():
     code = """
 %{
@@ -1,7 +1,6 @@
 import logging
-from typing import Any, Dict, Optional
-
-import cachetools
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from starkware.storage import metrics
 from starkware.storage.storage import Storage
@@ -29,11 +28,21 @@ class DictStorage(Storage):
         except KeyError:
             pass
 
+    async def mset(self, updates: Dict[bytes, bytes]):
+        # Update the dict directly, rather than creating a coroutine for each key.
+        self.db.update(updates)
+
+    async def mget(self, keys: Sequence[bytes]) -> Tuple[Optional[bytes], ...]:
+        return tuple(self.db.get(key, None) for key in keys)
+
 
 class CachedStorage(Storage):
     def __init__(self, storage: Storage, max_size: int, metric_active: bool = False):
         self.storage = storage
-        self.cache = cachetools.LRUCache(maxsize=max_size)
+        # An LRU cache: the most recently used keys are at the end.
+        # Since items are never deleted from this storage, an OrderedDict is sufficient.
+        self.cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self.max_size = max_size
         self.metric_active = metric_active
 
     @classmethod
@@ -46,21 +55,31 @@ class CachedStorage(Storage):
             metric_active=config["metric_active"],
         )
 
-    async def set_value(self, key: bytes, value: bytes):
+    def _add_to_cache(self, key: bytes, value: bytes):
         self.cache[key] = value
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    async def set_value(self, key: bytes, value: bytes):
+        self._add_to_cache(key, value)
         await self.storage.set_value(key, value)
 
     async def get_value(self, key: bytes) -> Optional[bytes]:
+        # Use a single lookup for both checking and fetching the key (note that None values are
+        # never cached).
+        value = self.cache.get(key)
         if self.metric_active:
             metrics.CACHED_STORAGE_GET_TOTAL.inc()
-        if key in self.cache:
-            if self.metric_active:
+            if value is not None:
                 metrics.CACHED_STORAGE_GET_CACHE.inc()
-            return self.cache[key]
+        if value is not None:
+            self.cache.move_to_end(key)
+            return value
         value = await self.storage.get_value(key)
         if value is None:
             return None
-        self.cache[key] = value
+        self._add_to_cache(key, value)
         return value
 
     async def del_value(self, key: bytes):
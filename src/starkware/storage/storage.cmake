@@ -27,7 +27,6 @@ python_lib(starkware_storage_lib
     starkware_serializability_utils_lib
     starkware_storage_metric_lib
     starkware_utils_time_lib
-    pip_cachetools
     pip_marshmallow
 )
 
@@ -2,7 +2,7 @@ import asyncio
 
 import pytest
 
-from starkware.storage.dict_storage import DictStorage
+from starkware.storage.dict_storage import CachedStorage, DictStorage
 from starkware.storage.storage import IntToIntMapping, Storage
 from starkware.storage.test_utils import DummyLockManager
 
@@ -41,7 +41,46 @@ async def test_from_config():
         await Storage.create_instance_from_config(config=config)
 
 
+@pytest.mark.asyncio
+async def test_dict_storage_mset_mget():
+    storage = DictStorage()
+    await storage.mset(updates={b"a": b"1", b"b": b"2"})
+    assert await storage.get_value(b"a") == b"1"
+    assert await storage.mget(keys=[b"b", b"c", b"a"]) == (b"2", None, b"1")
+
+
 def test_int_to_int_mapping_serializability():
     tested_object = IntToIntMapping(value=2021)
     serialized = tested_object.serialize()
     assert tested_object == IntToIntMapping.deserialize(data=serialized)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("metric_active", [False, True])
+async def test_cached_storage(metric_active: bool):
+    storage = DictStorage()
+    cached_storage = CachedStorage(storage=storage, max_size=2, metric_active=metric_active)
+
+    await cached_storage.set_value(b"a", b"1")
+    await storage.set_value(b"b", b"2")
+    assert await cached_storage.get_value(b"a") == b"1"
+    assert await cached_storage.get_value(b"b") == b"2"
+    assert await cached_storage.get_value(b"c") is None
+
+    # Values are served from the cache, even if the underlying storage changes.
+    await storage.set_value(b"a", b"3")
+    assert await cached_storage.get_value(b"a") == b"1"
+
+    # The least recently used key (b"b") is evicted.
+    await cached_storage.set_value(b"c", b"4")
+    assert list(cached_storage.cache.keys()) == [b"a", b"c"]
+
+
+@pytest.mark.asyncio
+async def test_indexed_db_object():
+    storage = DictStorage()
+    assert IntToIntMapping.key(index=5) == IntToIntMapping.db_key(suffix=b"5")
+
+    await IntToIntMapping(value=10).set_obj(storage=storage, index=5)
+    assert await storage.get_value(key=IntToIntMapping.key(index=5)) is not None
+    assert await IntToIntMapping.get_value_or_fail(storage=storage, key=5) == 10